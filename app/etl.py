@@ -1,203 +1,259 @@
 import pandas as pd
+import numpy as np
+import io
 import os
-import random
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import text
-from decimal import Decimal, InvalidOperation
 from .database import engine, SessionLocal
 from .models import Provider, Base
-from .geocoding import geocode_zip_code
+from .geocoding import load_zip_data
+
+# Stream the CSV in chunks of this many rows so peak memory stays bounded
+CHUNK_SIZE = 100000
+# COPY workers; keep below the engine's connection pool size
+NUM_WORKERS = 4
+# Cleaned chunks buffered between the parser and the COPY workers
+QUEUE_DEPTH = 4
+
+# Only parse the columns the ETL actually uses, with explicit dtypes so
+# pandas skips the rest of the wide CMS file and does no dtype inference.
+# DRG/zip stay strings here; clean_chunk coerces them with errors='coerce'.
+CSV_USECOLS = ['Rndrng_Prvdr_CCN', 'Rndrng_Prvdr_Org_Name', 'Rndrng_Prvdr_City',
+               'Rndrng_Prvdr_State_Abrvtn', 'Rndrng_Prvdr_Zip5', 'DRG_Cd',
+               'Tot_Dschrgs', 'Avg_Submtd_Cvrd_Chrg', 'Avg_Tot_Pymt_Amt',
+               'Avg_Mdcr_Pymt_Amt']
+CSV_DTYPES = {'Rndrng_Prvdr_CCN': 'string',
+              'Rndrng_Prvdr_Org_Name': 'string',
+              'Rndrng_Prvdr_City': 'string',
+              'Rndrng_Prvdr_State_Abrvtn': 'string',
+              'Rndrng_Prvdr_Zip5': 'string',
+              'DRG_Cd': 'string',
+              'Tot_Dschrgs': 'string',
+              'Avg_Submtd_Cvrd_Chrg': 'string',
+              'Avg_Tot_Pymt_Amt': 'string',
+              'Avg_Mdcr_Pymt_Amt': 'string'}
+
+RECORD_COLUMNS = ['provider_id', 'provider_name', 'provider_city',
+                  'provider_state', 'provider_zip_code', 'ms_drg_definition',
+                  'total_discharges', 'average_covered_charges',
+                  'average_total_payments', 'average_medicare_payments',
+                  'latitude', 'longitude', 'lat_rad', 'lon_rad',
+                  'sin_lat', 'cos_lat', 'star_rating', 'embedding_text']
+
+COPY_SQL = "COPY providers (id, {}) FROM STDIN WITH (FORMAT CSV)".format(
+    ', '.join(RECORD_COLUMNS))
 
 def create_tables():
     """Create all tables in the database"""
     try:
         Base.metadata.create_all(bind=engine)
+        # earthdistance lets the API push radius filtering and sorting into
+        # SQL; best effort since the extension may be missing on local installs
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS cube"))
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS earthdistance"))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS providers_ll_to_earth "
+                    "ON providers USING gist (ll_to_earth(latitude, longitude))"))
+        except Exception as e:
+            print(f"⚠️  earthdistance extension unavailable: {e}")
         print("✅ Database tables created successfully")
     except Exception as e:
         print(f"❌ Error creating tables: {e}")
         raise
 
+def clean_chunk(df, zdf):
+    """Validate/coerce one CSV chunk column-wise.
+
+    Returns (clean_df, error_count) where clean_df holds RECORD_COLUMNS.
+    """
+    # Clean and validate column-wise so per-cell work runs in vectorized C
+    # loops instead of Python-level int()/strip() calls per row
+    df['zip_str'] = df['Rndrng_Prvdr_Zip5'].astype(str).str.strip().str.zfill(5)
+    df['zip_int'] = pd.to_numeric(df['zip_str'], errors='coerce')
+    df['drg'] = pd.to_numeric(df['DRG_Cd'], errors='coerce')
+    df['discharges'] = pd.to_numeric(df['Tot_Dschrgs'], errors='coerce')
+    for col in ['Avg_Submtd_Cvrd_Chrg', 'Avg_Tot_Pymt_Amt', 'Avg_Mdcr_Pymt_Amt']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Drop invalid rows in bulk instead of try/except per row
+    bad = df[['zip_int', 'drg', 'discharges', 'Avg_Submtd_Cvrd_Chrg',
+              'Avg_Tot_Pymt_Amt', 'Avg_Mdcr_Pymt_Amt']].isna().any(axis=1)
+    error_count = int(bad.sum())
+    df = df[~bad].copy()
+
+    # Attach coordinates with a single hashed join against the zip reference
+    # data instead of a per-zip lookup loop
+    if zdf is not None:
+        df = df.merge(zdf, left_on='zip_str', right_on='postal code', how='left')
+    else:
+        df['latitude'] = None
+        df['longitude'] = None
+
+    # Build insert-ready columns in bulk
+    df['provider_id'] = df['Rndrng_Prvdr_CCN'].astype(str).str.strip()
+    df['provider_name'] = df['Rndrng_Prvdr_Org_Name'].astype(str).str.strip()
+    df['provider_city'] = df['Rndrng_Prvdr_City'].astype(str).str.strip()
+    df['provider_state'] = df['Rndrng_Prvdr_State_Abrvtn'].astype(str).str.strip()
+    df['provider_zip_code'] = df['zip_int'].astype(int)
+    df['ms_drg_definition'] = df['drg'].astype(int)
+    df['total_discharges'] = df['discharges'].astype(int)
+    df['average_covered_charges'] = df['Avg_Submtd_Cvrd_Chrg']
+    df['average_total_payments'] = df['Avg_Tot_Pymt_Amt']
+    df['average_medicare_payments'] = df['Avg_Mdcr_Pymt_Amt']
+    df['star_rating'] = np.random.randint(1, 11, size=len(df))
+    # Embedding text for the chat similarity ranker, concatenated once
+    # here instead of per provider on every /ask request; keep the format
+    # in sync with OpenAIService.get_provider_text
+    df['embedding_text'] = (df['provider_name'] + ' ' + df['provider_city']
+                            + ' ' + df['provider_state'] + ' DRG '
+                            + df['ms_drg_definition'].astype(str))
+
+    # Precompute radian/trig columns once here; NaN coordinates propagate
+    # through to NULLs
+    lat_rad = np.radians(df['latitude'].astype(float))
+    df['lat_rad'] = lat_rad
+    df['lon_rad'] = np.radians(df['longitude'].astype(float))
+    df['sin_lat'] = np.sin(lat_rad)
+    df['cos_lat'] = np.cos(lat_rad)
+
+    return df[RECORD_COLUMNS], error_count
+
+def copy_chunk(cursor, clean):
+    """COPY one cleaned chunk into providers via the raw psycopg2 cursor"""
+    clean = clean.copy()
+    clean.insert(0, 'id', [uuid.uuid4() for _ in range(len(clean))])
+    buf = io.StringIO()
+    # NaN cells become empty CSV fields, which COPY reads as NULL
+    clean.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+    cursor.copy_expert(COPY_SQL, buf)
+
+def copy_worker(work_queue, counters, lock):
+    """Drain cleaned chunks from the queue and COPY each on its own connection"""
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        while True:
+            clean = work_queue.get()
+            if clean is None:
+                break
+            copy_chunk(cursor, clean)
+            raw_conn.commit()
+            with lock:
+                counters['processed'] += len(clean)
+                print(f"Processed {counters['processed']} records...")
+        cursor.close()
+    finally:
+        raw_conn.close()
+
+def load_chunks(csv_file, zdf):
+    """Stream the CSV in chunks, cleaning and COPYing each one.
+
+    Parsing/cleaning runs on the main thread while a small pool of workers
+    overlaps the COPYs on their own connections, so DB round-trips hide
+    behind CSV parsing and vice versa.
+
+    Returns (processed_count, error_count).
+    """
+    error_count = 0
+    counters = {'processed': 0}
+    lock = threading.Lock()
+    work_queue = queue.Queue(maxsize=QUEUE_DEPTH)
+
+    # latin-1 decodes any byte, so a single parse pass always succeeds;
+    # CMS public-use files are latin-1 compatible
+    reader = pd.read_csv(
+        csv_file,
+        encoding='latin-1',
+        on_bad_lines='skip',
+        usecols=CSV_USECOLS,
+        dtype=CSV_DTYPES,
+        chunksize=CHUNK_SIZE
+    )
+
+    # COPY FROM STDIN skips SQL parsing and per-row parameter binding
+    # entirely - another order of magnitude over executemany for bulk loads
+    with ThreadPoolExecutor(max_workers=NUM_WORKERS) as pool:
+        workers = [pool.submit(copy_worker, work_queue, counters, lock)
+                   for _ in range(NUM_WORKERS)]
+        workers_dead = False
+        try:
+            for chunk in reader:
+                clean, errors = clean_chunk(chunk, zdf)
+                error_count += errors
+                # Bounded put with a liveness check: if every worker has
+                # died (e.g. the DB went away mid-load) nothing drains the
+                # queue, and a plain blocking put would hang the producer
+                # forever once it fills
+                while not workers_dead:
+                    try:
+                        work_queue.put(clean, timeout=1)
+                        break
+                    except queue.Full:
+                        workers_dead = all(w.done() for w in workers)
+                if workers_dead:
+                    break
+        finally:
+            for _ in range(NUM_WORKERS):
+                while True:
+                    try:
+                        work_queue.put(None, timeout=1)
+                        break
+                    except queue.Full:
+                        # No live worker left to consume a sentinel
+                        if all(w.done() for w in workers):
+                            break
+        # Surface any worker failure to the caller
+        for worker in workers:
+            worker.result()
+
+    return counters['processed'], error_count
+
 def load_csv_data():
     """Load data from CSV file and populate the database"""
     csv_file = "MUP_INP_RY24_P03_V10_DY22_PrvSvc.csv"
-    
+
     if not os.path.exists(csv_file):
         print(f"CSV file {csv_file} not found!")
         return
-    
-    # Try different approaches to read the CSV file
-    df = None
-    
-    # Method 1: Try with error handling
-    try:
-        print("Trying to read CSV with error handling...")
-        df = pd.read_csv(
-            csv_file,
-            encoding='utf-8',
-            on_bad_lines='skip',
-            low_memory=False
-        )
-        print("✅ Successfully read CSV with error handling")
-    except Exception as e:
-        print(f"❌ Error with error handling: {e}")
-        
-        # Method 2: Try with different encoding
-        try:
-            print("Trying with latin-1 encoding...")
-            df = pd.read_csv(
-                csv_file,
-                encoding='latin-1',
-                on_bad_lines='skip',
-                low_memory=False
-            )
-            print("✅ Successfully read CSV with latin-1 encoding")
-        except Exception as e:
-            print(f"❌ Error with latin-1 encoding: {e}")
-            
-            # Method 3: Try with cp1252 encoding
-            try:
-                print("Trying with cp1252 encoding...")
-                df = pd.read_csv(
-                    csv_file,
-                    encoding='cp1252',
-                    on_bad_lines='skip',
-                    low_memory=False
-                )
-                print("✅ Successfully read CSV with cp1252 encoding")
-            except Exception as e:
-                print(f"❌ Error with cp1252 encoding: {e}")
-                
-                # Method 4: Last resort - read with errors='replace'
-                try:
-                    print("Trying with error replacement...")
-                    df = pd.read_csv(
-                        csv_file,
-                        encoding='utf-8',
-                        on_bad_lines='skip',
-                        low_memory=False,
-                        error_bad_lines=False,
-                        warn_bad_lines=False
-                    )
-                    print("✅ Successfully read CSV with error replacement")
-                except Exception as e:
-                    print(f"❌ All methods failed: {e}")
-                    return
-    
-    if df is None:
-        print("❌ Failed to read CSV file with any method")
-        return
-    
-    print(f"📊 Loaded {len(df)} rows from CSV file")
-    
-    # Create a mapping of unique zip codes to coordinates
-    print("🔍 Creating unique zip code mapping...")
-    unique_zip_codes = df['Rndrng_Prvdr_Zip5'].astype(str).str.zfill(5).unique()
-    zip_code_coordinates = {}
-    
-    print(f"📍 Found {len(unique_zip_codes)} unique zip codes to geocode")
-    
-    # Geocode each unique zip code using simple mapping
-    geocoded_count = 0
-    for zip_code_str in unique_zip_codes:
-        latitude, longitude = geocode_zip_code(zip_code_str)
-        if latitude and longitude:
-            zip_code_coordinates[zip_code_str] = (latitude, longitude)
-            geocoded_count += 1
-        if geocoded_count % 100 == 0:
-            print(f"🌍 Geocoded {geocoded_count}/{len(unique_zip_codes)} unique zip codes...")
-    print(f"✅ Successfully geocoded {geocoded_count} unique zip codes")
-    
+
+    # Zip reference data for the coordinate merge
+    zip_data = load_zip_data()
+    if not zip_data.empty:
+        zdf = zip_data[['postal code', 'latitude', 'longitude']].drop_duplicates('postal code')
+    else:
+        print("⚠️  Zip code data is empty; providers will have no coordinates")
+        zdf = None
+
     # Create database session
     db = SessionLocal()
-    
+
     try:
         # Test database connection
         print("Testing database connection...")
         db.execute(text("SELECT 1"))
         print("✅ Database connection successful")
-        
-        # Clear existing data
+
+        # Clear existing data; TRUNCATE reclaims storage in O(1) instead of
+        # writing a WAL record per deleted row and leaving dead tuples behind
         print("Clearing existing data...")
-        deleted_count = db.query(Provider).delete()
-        db.commit()
-        print(f"✅ Cleared {deleted_count} existing records")
-        
-        # Process each row
-        processed_count = 0
-        error_count = 0
-        
-        for index, row in df.iterrows():
-            try:
-                provider_id = str(row['Rndrng_Prvdr_CCN']).strip()
-                city = str(row['Rndrng_Prvdr_City']).strip()
-                state = str(row['Rndrng_Prvdr_State_Abrvtn']).strip()
-                zip_code_raw = str(row['Rndrng_Prvdr_Zip5']).strip()
-                # Check for NaN or non-numeric zip code
-                if pd.isna(zip_code_raw) or not zip_code_raw.isdigit():
-                    print(f"⚠️  Skipping row {index+1}: Missing or invalid zip code '{zip_code_raw}'")
-                    error_count += 1
-                    continue
-
-                zip_code_str = zip_code_raw.zfill(5)
-                try:
-                    zip_code = int(zip_code_raw)
-                except Exception:
-                    print(f"⚠️  Skipping row {index+1}: Invalid zip code '{zip_code_raw}'")
-                    error_count += 1
-                    continue
-                try:
-                    ms_drg_definition = int(row['DRG_Cd'])
-                except Exception:
-                    print(f"⚠️  Skipping row {index+1}: Invalid ms_drg_definition '{row['DRG_Cd']}'")
-                    error_count += 1
-                    continue
-                try:
-                    avg_covered = Decimal(str(row['Avg_Submtd_Cvrd_Chrg']))
-                    avg_total = Decimal(str(row['Avg_Tot_Pymt_Amt']))
-                    avg_medicare = Decimal(str(row['Avg_Mdcr_Pymt_Amt']))
-                except (InvalidOperation, Exception):
-                    print(f"⚠️  Skipping row {index+1}: Invalid decimal value(s)")
-                    error_count += 1
-                    continue
-                
-                # Get coordinates from the zip code mapping
-                latitude, longitude = zip_code_coordinates.get(zip_code_str, (None, None))
-                
-                provider = Provider(
-                    provider_id=provider_id,
-                    provider_name=str(row['Rndrng_Prvdr_Org_Name']).strip(),
-                    provider_city=city,
-                    provider_state=state,
-                    provider_zip_code=zip_code,
-                    ms_drg_definition=ms_drg_definition,
-                    total_discharges=int(float(row['Tot_Dschrgs'])),
-                    average_covered_charges=avg_covered,
-                    average_total_payments=avg_total,
-                    average_medicare_payments=avg_medicare,
-                    latitude=latitude,
-                    longitude=longitude,
-                    star_rating=random.randint(1, 10)
-                )
-                
-                db.add(provider)
-                processed_count += 1
-                
-                if processed_count % 1000 == 0:
-                    db.commit()
-                    print(f"Processed {processed_count} records...")
-                
-            except Exception as e:
-                error_count += 1
-                print(f"Error processing row {index + 1}: {e}")
-                print(f"Row data: {row.to_dict()}")
-                continue
-        
+        db.execute(text("TRUNCATE TABLE providers RESTART IDENTITY"))
         db.commit()
+        print("✅ Cleared existing records")
+
+        processed_count, error_count = load_chunks(csv_file, zdf)
+
         print(f"✅ Successfully processed {processed_count} records into the database")
         if error_count > 0:
             print(f"⚠️  {error_count} records had errors and were skipped")
-        
+
     except SQLAlchemyError as e:
         print(f"❌ Database error: {e}")
         if db.is_active:
@@ -213,8 +269,11 @@ def run_etl():
     """Run the complete ETL process"""
     print("Creating database tables...")
     create_tables()
-    
+
     print("Loading CSV data...")
     load_csv_data()
-    
-    print("ETL process completed!") 
\ No newline at end of file
+
+    print("ETL process completed!")
+
+if __name__ == "__main__":
+    run_etl()
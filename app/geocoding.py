@@ -1,11 +1,23 @@
 import pandas as pd
+import numpy as np
 import os
+from functools import lru_cache
 from math import radians, cos, sin, asin, sqrt
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
 
+# numexpr fuses elementwise array expressions into one threaded C kernel,
+# avoiding the intermediate arrays NumPy allocates per operation
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
 # Load the zip codes data once at module level
 _zip_data = None
+# Dict indexes keyed by the 5-char zip string for O(1) lookups
+_zip_lat = {}
+_zip_lon = {}
 
 def load_zip_data():
     """Load the zip codes data from CSV file, forcing zip code as string"""
@@ -14,7 +26,17 @@ def load_zip_data():
         try:
             csv_file = "USZipsWithLatLon_20231227.csv"
             if os.path.exists(csv_file):
-                _zip_data = pd.read_csv(csv_file, dtype={"postal code": str})
+                try:
+                    # Arrow's multi-threaded parser is much faster than the
+                    # default C engine; fall back if pyarrow isn't installed
+                    _zip_data = pd.read_csv(csv_file, dtype={"postal code": str},
+                                            engine='pyarrow')
+                except (ImportError, ValueError):
+                    _zip_data = pd.read_csv(csv_file, dtype={"postal code": str})
+                # Build dict indexes once so lookups are O(1) hash hits
+                # instead of a full-column boolean mask per call
+                _zip_lat.update(zip(_zip_data['postal code'], _zip_data['latitude']))
+                _zip_lon.update(zip(_zip_data['postal code'], _zip_data['longitude']))
                 print(f"✅ Loaded {len(_zip_data)} zip codes from {csv_file}")
             else:
                 print(f"⚠️  Zip codes CSV file {csv_file} not found")
@@ -24,8 +46,18 @@ def load_zip_data():
             _zip_data = pd.DataFrame()
     return _zip_data
 
+@lru_cache(maxsize=20000)
 def geocode_zip_code_nominatim(zip_code: str) -> tuple:
-    """Geocode a zip code using Nominatim (for API endpoint)"""
+    """Geocode a zip code using Nominatim (for API endpoint).
+
+    Results are cached, and zip codes present in the local reference CSV
+    resolve without the HTTP round-trip at all.
+    """
+    # Fast path: the local zip CSV covers all standard US zips
+    lat, lng = geocode_zip_code(zip_code)
+    if lat is not None and lng is not None:
+        return lat, lng
+
     try:
         geolocator = Nominatim(user_agent="providers_api")
         location_string = f"{zip_code}, USA"
@@ -48,28 +80,23 @@ def geocode_zip_code_nominatim(zip_code: str) -> tuple:
 def geocode_zip_code(zip_code: str) -> tuple:
     """Geocode a zip code using the CSV data (for ETL)"""
     try:
-        zip_data = load_zip_data()
-        if zip_data.empty:
+        if load_zip_data().empty:
             print("⚠️  Zip code data is empty")
             return None, None
-        
+
         # Clean the zip code and always use string for matching
         zip_code_str = str(zip_code).zfill(5)
-        print(f"🔍 Looking up coordinates for zip code: {zip_code_str}")
-        
-        # Try to find a match by zip code (as string)
-        matches = zip_data[zip_data['postal code'] == zip_code_str]
-        
-        if len(matches) > 0:
-            # Take the first match
-            lat = float(matches.iloc[0]['latitude'])
-            lng = float(matches.iloc[0]['longitude'])
-            print(f"✅ Found coordinates for {zip_code_str}: {lat}, {lng}")
-            return lat, lng
+
+        # O(1) dict lookup against the prebuilt index
+        lat = _zip_lat.get(zip_code_str)
+        lng = _zip_lon.get(zip_code_str)
+
+        if lat is not None and lng is not None:
+            return float(lat), float(lng)
         else:
             print(f"⚠️  Could not find coordinates for zip code: {zip_code_str}")
             return None, None
-            
+
     except Exception as e:
         print(f"⚠️  Geocoding error for zip code {zip_code}: {e}")
         return None, None
@@ -112,6 +139,43 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
         print(f"⚠️  Distance calculation error: {e}")
         return float('inf')  # Return infinity if calculation fails
 
+def calculate_distance_array(lat1: float, lon1: float, lat2, lon2) -> np.ndarray:
+    """Vectorized Haversine: distances in km from one point to arrays of points"""
+    lat1 = np.radians(lat1)
+    lon1 = np.radians(lon1)
+    lat2 = np.radians(np.asarray(lat2, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lon2, dtype=np.float64))
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    if numexpr is not None:
+        a = numexpr.evaluate(
+            "sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2")
+    else:
+        a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+
+    # Radius of earth in kilometers
+    return 2 * 6371 * np.arcsin(np.sqrt(a))
+
+def calculate_distance_precomputed(lat1: float, lon1: float,
+                                   sin_lat2, cos_lat2, lon2_rad) -> np.ndarray:
+    """Vectorized great-circle distance reusing trig columns precomputed at ETL
+
+    Takes the Provider sin_lat/cos_lat/lon_rad columns, so the only per-row
+    transcendental work left is one cos and one arccos.
+    """
+    lat1_rad = radians(lat1)
+    sin_lat1 = sin(lat1_rad)
+    cos_lat1 = cos(lat1_rad)
+    lon1_rad = radians(lon1)
+
+    cos_dlon = np.cos(np.asarray(lon2_rad, dtype=np.float64) - lon1_rad)
+    cos_c = (sin_lat1 * np.asarray(sin_lat2, dtype=np.float64)
+             + cos_lat1 * np.asarray(cos_lat2, dtype=np.float64) * cos_dlon)
+
+    # Radius of earth in kilometers
+    return 6371 * np.arccos(np.clip(cos_c, -1.0, 1.0))
+
 def is_within_radius(lat1: float, lon1: float, lat2: float, lon2: float, radius_km: float) -> bool:
     """Check if two points are within the specified radius"""
     distance = calculate_distance(lat1, lon1, lat2, lon2)
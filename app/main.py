@@ -1,13 +1,17 @@
 from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy import Float, cast, func, select
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import ProgrammingError
 from typing import List, Optional
+import numpy as np
 import uvicorn
 
 from .database import get_db, engine
 from .models import Provider, Base
 from .schemas import Provider as ProviderSchema, AskRequest, AskResponse
-from .etl import run_etl
-from .geocoding import geocode_zip_code_nominatim, is_within_radius
+from .geocoding import (geocode_zip_code_nominatim, calculate_distance_array,
+                        calculate_distance_precomputed)
 from .openai_service import OpenAIService
 
 # Create tables
@@ -18,11 +22,34 @@ app = FastAPI(title="Providers API", description="API for managing healthcare pr
 # Initialize OpenAI service
 openai_service = OpenAIService()
 
-@app.on_event("startup")
-async def startup_event():
-    """Run ETL process on startup"""
-    print("Running ETL process on startup...")
-    run_etl()
+# Columns served by /providers, with the Numeric payment columns cast to
+# float in SQL - float compares and JSON-encodes far cheaper than Decimal,
+# and monetary precision only matters at write time
+_pt = Provider.__table__
+PROVIDER_COLUMNS = [
+    _pt.c.id, _pt.c.provider_id, _pt.c.provider_name, _pt.c.provider_city,
+    _pt.c.provider_state, _pt.c.provider_zip_code, _pt.c.ms_drg_definition,
+    _pt.c.total_discharges,
+    cast(_pt.c.average_covered_charges, Float).label('average_covered_charges'),
+    cast(_pt.c.average_total_payments, Float).label('average_total_payments'),
+    cast(_pt.c.average_medicare_payments, Float).label('average_medicare_payments'),
+    _pt.c.latitude, _pt.c.longitude,
+    _pt.c.lat_rad, _pt.c.lon_rad, _pt.c.sin_lat, _pt.c.cos_lat,
+    _pt.c.star_rating,
+]
+
+def _providers_response(rows):
+    """Serialize trusted provider rows without re-validation.
+
+    The rows come straight from the providers table already in schema
+    shape, so model_construct skips per-field validation and returning a
+    prebuilt JSONResponse skips FastAPI's response-model validation pass;
+    response_model stays on the route for the OpenAPI docs.
+    """
+    return JSONResponse([
+        ProviderSchema.model_construct(**row).model_dump(mode='json')
+        for row in rows
+    ])
 
 @app.get("/")
 async def root():
@@ -37,51 +64,75 @@ async def get_providers(
 ):
     """Get providers with optional filtering by DRG, zip code, and radius. Results are sorted by average_total_payments ascending."""
     
-    # Start with all providers
-    query = db.query(Provider)
-    
+    # Select table rows directly - the endpoint only serializes them, so
+    # skipping ORM object hydration saves an instance + identity-map entry
+    # per row; FastAPI validates the mappings against the response schema
+    stmt = select(*PROVIDER_COLUMNS)
+
     # Filter by DRG if provided
     if drg is not None:
-        query = query.filter(Provider.ms_drg_definition == drg)
-    
-    # Get all providers that match the DRG filter
-    providers = query.all()
-    
+        stmt = stmt.where(Provider.ms_drg_definition == drg)
+
+    # Sort by average_total_payments (ascending) in SQL, where the composite
+    # index applies; no Python-side re-sort is needed afterwards
+    stmt = stmt.order_by(Provider.average_total_payments.asc())
+
     # Filter by zip code and radius if both are provided
     if zip is not None and radius_km is not None:
         # Geocode the input zip code using Nominatim
         zip_lat, zip_lon = geocode_zip_code_nominatim(str(zip).zfill(5))
-        
+
         if zip_lat is None or zip_lon is None:
             raise HTTPException(
-                status_code=400, 
+                status_code=400,
                 detail=f"Could not geocode zip code: {zip}"
             )
-        
-        # Filter providers by distance
-        filtered_providers = []
-        for provider in providers:
-            # Skip providers without coordinates
-            if provider.latitude is None or provider.longitude is None:
-                continue
-            
-            # Check if provider is within radius
-            if is_within_radius(
-                zip_lat, zip_lon, 
-                provider.latitude, provider.longitude, 
-                radius_km
-            ):
-                filtered_providers.append(provider)
-        
-        providers = filtered_providers
-    
-    # Sort by average_total_payments (ascending)
-    providers = sorted(providers, key=lambda p: p.average_total_payments)
-    
-    return providers
+
+        coords_stmt = stmt.where(Provider.latitude.isnot(None),
+                                 Provider.longitude.isnot(None))
+
+        # Push the radius filter into SQL via earthdistance: the earth_box
+        # prefilter hits the GiST index, so only rows inside the radius come
+        # back, already sorted
+        try:
+            point = func.ll_to_earth(zip_lat, zip_lon)
+            provider_point = func.ll_to_earth(Provider.latitude, Provider.longitude)
+            radius_m = radius_km * 1000
+            return _providers_response(db.execute(
+                coords_stmt
+                .where(func.earth_box(point, radius_m).op('@>')(provider_point))
+                .where(func.earth_distance(point, provider_point) <= radius_m)
+            ).mappings())
+        except ProgrammingError:
+            # earthdistance extension not installed; fall back to the
+            # vectorized in-Python filter
+            db.rollback()
+
+        rows = db.execute(coords_stmt).mappings().all()
+
+        # Filter rows by distance in one vectorized Haversine pass
+        if rows:
+            if all(r['sin_lat'] is not None for r in rows):
+                # Use the trig columns precomputed at ETL time
+                distances = calculate_distance_precomputed(
+                    zip_lat, zip_lon,
+                    np.array([r['sin_lat'] for r in rows]),
+                    np.array([r['cos_lat'] for r in rows]),
+                    np.array([r['lon_rad'] for r in rows])
+                )
+            else:
+                # Rows loaded before the trig columns existed
+                lats = np.array([r['latitude'] for r in rows])
+                lons = np.array([r['longitude'] for r in rows])
+                distances = calculate_distance_array(zip_lat, zip_lon, lats, lons)
+            rows = [r for r, d in zip(rows, distances) if d <= radius_km]
+
+        return _providers_response(rows)
+
+    return _providers_response(db.execute(stmt).mappings())
 
 @app.post("/ask", response_model=AskResponse)
-async def ask_question(request: AskRequest):
+async def ask_question(request: AskRequest, db: Session = Depends(get_db)):
     """Ask questions about healthcare providers using AI"""
     try:
         print(f"🔍 Received question: {request.question}")
@@ -95,7 +146,7 @@ async def ask_question(request: AskRequest):
         
         # Call OpenAI service
         print("📝 Calling OpenAI service...")
-        answer = await openai_service.ask(request.question)
+        answer = await openai_service.ask(request.question, db)
         print(f"✅ Generated answer: {answer}")
         
         return AskResponse(answer=answer)
@@ -1,11 +1,18 @@
-from sqlalchemy import Column, String, Integer, Float, Numeric
+from sqlalchemy import Column, String, Integer, Float, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from .database import Base
 
 class Provider(Base):
     __tablename__ = "providers"
-    
+
+    # Composite index matching the /providers access pattern: filter on DRG,
+    # sort by average_total_payments - one ordered index range scan
+    __table_args__ = (
+        Index('ix_providers_drg_avg', 'ms_drg_definition', 'average_total_payments'),
+        Index('ix_providers_latlon', 'latitude', 'longitude'),
+    )
+
     # Use UUID as primary key
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -21,4 +28,13 @@ class Provider(Base):
     average_medicare_payments = Column(Numeric(precision=18, scale=2), nullable=False)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
-    star_rating = Column(Integer, nullable=False) 
\ No newline at end of file
+    # Radians/trig of the coordinates, precomputed at ETL time so radius
+    # queries don't redo the same transcendental math per row
+    lat_rad = Column(Float, nullable=True)
+    lon_rad = Column(Float, nullable=True)
+    sin_lat = Column(Float, nullable=True)
+    cos_lat = Column(Float, nullable=True)
+    star_rating = Column(Integer, nullable=False)
+    # Text embedded for similarity ranking, prebuilt at ETL time so the
+    # chat path doesn't re-concatenate it per provider per request
+    embedding_text = Column(String, nullable=True)
\ No newline at end of file
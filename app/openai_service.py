@@ -1,14 +1,57 @@
 import os
 import numpy as np
 from typing import List, Optional
-from openai import OpenAI
+from fastapi.concurrency import run_in_threadpool
+from openai import AsyncOpenAI
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import ProgrammingError
 from .models import Provider
-from .database import SessionLocal
-from .geocoding import geocode_zip_code, is_within_radius
+from .geocoding import (geocode_zip_code_nominatim, calculate_distance_array,
+                        calculate_distance_precomputed)
 import json
+import logging
+import re
 import threading
 
+logger = logging.getLogger(__name__)
+
+# All query tokens for get_relevant_providers in one fused pattern, so a
+# single finditer pass over the question replaces three separate scans.
+# Alternatives are ordered most-specific first: radius phrases claim their
+# number before it can be mistaken for a DRG code.
+_PARSE_RE = re.compile(
+    r'(?P<radius>\d+(?:\.\d+)?)\s*(?:km\b|kilometers?\b|radius\b)'
+    r'|within\s+(?P<radius2>\d+(?:\.\d+)?)\b'
+    r'|\b(?P<zip>\d{4,5})\b'
+    r'|\b(?P<drg>\d{1,3})\b',
+    re.IGNORECASE
+)
+
+# Obviously-healthcare terms; a hit means the yes/no GPT gate in
+# is_healthcare_related is pure latency and can be skipped
+HEALTHCARE_KEYWORDS = [
+    'hospital', 'medical', 'doctor', 'surgery', 'treatment', 'procedure',
+    'health', 'medicine', 'patient', 'clinic', 'provider', 'rating',
+    'cost', 'payment', 'diagnosis', 'disease', 'heart', 'cardiac',
+    'cancer', 'emergency', 'specialist', 'nurse'
+]
+_KEYWORD_RE = re.compile(
+    r'\b(?:' + '|'.join(HEALTHCARE_KEYWORDS) + r')\b', re.IGNORECASE)
+
+# Rows fetched per round-trip when streaming candidates from the DB
+STREAM_BATCH = 1000
+
+# Candidate pool for similarity ranking when the question has no structured
+# filters; one EMBED_BATCH API call covers the whole pool and the quantized
+# matrix stays a few MB instead of scaling with the full table
+SIMILARITY_CANDIDATES = 1000
+
+# OpenAI accepts up to 2048 inputs per embeddings request; stay under it
+EMBED_BATCH = 1024
+# Embedding cache shards; power of two so shard picking is a mask
+CACHE_SHARDS = 16
+
 class OpenAIService:
     def __init__(self):
         api_key = os.getenv("OPENAI_API_KEY")
@@ -17,25 +60,30 @@ class OpenAIService:
             print("⚠️  Please create a .env file with OPENAI_API_KEY=your_api_key_here")
             self.client = None
         else:
-            self.client = OpenAI(api_key=api_key)
+            # Async client: OpenAI round-trips await instead of blocking
+            # the event loop that serves every other request
+            self.client = AsyncOpenAI(api_key=api_key)
         self.model = "gpt-4o"
         self.embedding_model = "text-embedding-ada-002"
-        self.embedding_cache = {}
-        self.cache_lock = threading.Lock()
+        # Sharded cache: concurrent requests only contend when they insert
+        # into the same shard; reads never take a lock at all
+        self.cache_shards = [({}, threading.Lock()) for _ in range(CACHE_SHARDS)]
+        # Quantized provider matrix, built lazily on the first similarity
+        # query and reused until the candidate set changes (e.g. after an
+        # ETL reload); holds (provider ids, int8 matrix, row scales)
+        self.provider_matrix = None
         
-    def is_healthcare_related(self, query: str) -> bool:
+    async def is_healthcare_related(self, query: str) -> bool:
         """Check if the query is related to healthcare/medical topics using OpenAI"""
+        # Cheap local gate first: one regex scan settles the obvious cases
+        # without a classifier round-trip
+        if _KEYWORD_RE.search(query):
+            return True
+
         if not self.client:
-            # If no OpenAI client, use simple keyword matching as fallback
-            healthcare_keywords = [
-                'hospital', 'medical', 'doctor', 'surgery', 'treatment', 'procedure',
-                'health', 'medicine', 'patient', 'clinic', 'provider', 'rating',
-                'cost', 'payment', 'diagnosis', 'disease', 'heart', 'cardiac',
-                'cancer', 'emergency', 'specialist', 'nurse'
-            ]
-            query_lower = query.lower()
-            return any(keyword in query_lower for keyword in healthcare_keywords)
-        
+            # If no OpenAI client, the keyword scan above is the whole check
+            return False
+
         system_prompt = """
         You are a filter that determines if a user question is related to healthcare, medical procedures, 
         hospital information, medical costs, or provider ratings. 
@@ -58,7 +106,7 @@ class OpenAIService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -75,14 +123,14 @@ class OpenAIService:
             # Default to True to err on the side of caution
             return True
     
-    def get_embedding(self, text: str) -> List[float]:
+    async def get_embedding(self, text: str) -> List[float]:
         """Get OpenAI embedding for text"""
         if not self.client:
             # Return empty list if no client available
             return []
-        
+
         try:
-            response = self.client.embeddings.create(
+            response = await self.client.embeddings.create(
                 model=self.embedding_model,
                 input=text
             )
@@ -93,68 +141,182 @@ class OpenAIService:
     
     def cosine_similarity(self, a: List[float], b: List[float]) -> float:
         """Calculate cosine similarity between two vectors"""
-        if not a or not b:
+        if not len(a) or not len(b):
             return 0.0
-        
-        a_norm = np.linalg.norm(a)
-        b_norm = np.linalg.norm(b)
-        
-        if a_norm == 0 or b_norm == 0:
+
+        # Convert once up front; the raw OpenAI response is a Python list
+        # and every np call would otherwise re-convert it
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+
+        # vdot's self-products skip the per-norm sqrt, leaving one sqrt total
+        denom = np.sqrt(np.vdot(a, a) * np.vdot(b, b))
+        if denom == 0:
             return 0.0
-            
-        return np.dot(a, b) / (a_norm * b_norm)
+
+        return float(np.dot(a, b) / denom)
     
-    def get_provider_embedding(self, provider_text: str) -> List[float]:
+    async def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for many texts in as few API calls as possible.
+
+        Cache hits are answered locally; only the misses go to OpenAI, packed
+        up to EMBED_BATCH inputs per request instead of one round-trip per
+        text. Result order matches the input order.
+        """
+        results = [None] * len(texts)
+        missing = []
+        for i, text in enumerate(texts):
+            # Dict reads are atomic under the GIL - no lock on the hit path
+            shard, _ = self.cache_shards[hash(text) & (CACHE_SHARDS - 1)]
+            cached = shard.get(text)
+            if cached is not None:
+                results[i] = cached
+            else:
+                missing.append(i)
+
+        if missing and self.client:
+            for start in range(0, len(missing), EMBED_BATCH):
+                batch = missing[start:start + EMBED_BATCH]
+                try:
+                    response = await self.client.embeddings.create(
+                        model=self.embedding_model,
+                        input=[texts[i] for i in batch]
+                    )
+                    for i, item in zip(batch, response.data):
+                        results[i] = item.embedding
+                        shard, lock = self.cache_shards[hash(texts[i]) & (CACHE_SHARDS - 1)]
+                        with lock:
+                            shard[texts[i]] = item.embedding
+                except Exception as e:
+                    print(f"Error getting embeddings batch: {e}")
+
+        return [r if r is not None else [] for r in results]
+
+    async def get_provider_embedding(self, provider_text: str) -> List[float]:
         """Get or calculate the embedding for a provider, using a cache to improve performance."""
-        with self.cache_lock:
-            if provider_text in self.embedding_cache:
-                return self.embedding_cache[provider_text]
+        return (await self.get_embeddings_batch([provider_text]))[0]
+
+    def get_provider_text(self, provider: Provider) -> str:
+        """Text used to embed a provider for similarity ranking"""
+        # Prefer the column prebuilt at ETL time; format per-row only for
+        # rows loaded before the column existed
+        if provider.embedding_text:
+            return provider.embedding_text
+        return (f"{provider.provider_name} {provider.provider_city} "
+                f"{provider.provider_state} DRG {provider.ms_drg_definition}")
 
-        # Calculate the embedding if not in cache
-        embedding = self.get_embedding(provider_text)
-        with self.cache_lock:
-            self.embedding_cache[provider_text] = embedding
-        return embedding
+    async def build_provider_matrix(self, providers: List[Provider]):
+        """Build a quantized embedding matrix for the given providers.
 
-    def get_relevant_providers(self, query: str, limit: int = 10) -> List[Provider]:
+        Returns (matrix, scales) where matrix is an (N, D) int8 array whose
+        rows align with `providers` and scales holds the per-row
+        dequantization factors, or None when embeddings are unavailable.
+        Rows are unit-normalized before quantization, so query scoring
+        reduces to a single matrix-vector product; int8 storage moves 4x
+        less memory per scoring pass than float32.
         """
-        Fast & reliable provider retrieval.
-        1. Parse possible `drg`, `zip`, `radius_km` tokens from the question.
-        2. Call the already-existing /providers endpoint (same process, no network hop)
-           so we inherit all the geocoding / radius logic that is known to work.
-        3. Return at most `limit` rows (already sorted by cost in the router).
+        texts = [self.get_provider_text(p) for p in providers]
+        embeddings = await self.get_embeddings_batch(texts)
+        if not embeddings or not all(embeddings):
+            return None
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        # Symmetric per-row quantization to int8
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+
+    async def _get_provider_matrix(self, providers: List[Provider]):
+        """Return the quantized matrix for these providers, cached on self.
+
+        The candidate set is stable between requests (same query, same cost
+        order), so the stack/normalize/quantize pass runs once per provider
+        set instead of per request; a different id sequence - new providers
+        after an ETL reload - invalidates the cache and rebuilds.
         """
-        # ---------- extract tokens ----------
-        query_lc = query.lower()
-        
-        # Extract DRG codes (2-3 digits)
-        drg = None
-        for word in query_lc.split():
-            if word.isdigit() and len(word) <= 3:
-                drg = int(word)
-                break
-        
-        # Extract zip codes (4-5 digits) - more robust extraction
-        zip_code = None
-        import re
-        zip_pattern = r'\b\d{4,5}\b'  # Match 4-5 digit numbers as word boundaries
-        zip_matches = re.findall(zip_pattern, query)
-        if zip_matches:
-            zip_code = int(zip_matches[0])
-        
-        # Extract radius (default 40km)
-        radius_km = 40.0
-        radius_keywords = ['km', 'kilometer', 'kilometers', 'radius', 'within']
-        for word in query_lc.split():
-            if word.replace('.', '').isdigit() and any(k in query_lc for k in radius_keywords):
-                radius_km = float(word)
-                break
+        ids = [p.id for p in providers]
+        if self.provider_matrix is not None and self.provider_matrix[0] == ids:
+            return self.provider_matrix[1], self.provider_matrix[2]
 
-        print(f"🔍 Extracted from query '{query}': drg={drg}, zip={zip_code}, radius_km={radius_km}")
+        built = await self.build_provider_matrix(providers)
+        if built is None:
+            return None
+        self.provider_matrix = (ids, built[0], built[1])
+        return built
 
-        # ---------- delegate to existing SQL logic ----------
-        # Use direct database query instead of TestClient to avoid circular imports
-        db = SessionLocal()
+    async def rank_providers_by_similarity(self, question: str, providers: List[Provider],
+                                           limit: int) -> List[Provider]:
+        """Rank providers against the question with one BLAS matmul.
+
+        Scoring is provider_matrix @ normalized_query - one SIMD-vectorized
+        GEMV instead of a cosine_similarity call per provider. Falls back to
+        the incoming order when embeddings are unavailable.
+        """
+        if not self.client or len(providers) <= limit:
+            return providers[:limit]
+
+        built = await self._get_provider_matrix(providers)
+        query_embedding = await self.get_embedding(question)
+        if built is None or not query_embedding:
+            return providers[:limit]
+        matrix, row_scales = built
+
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q_norm = np.linalg.norm(q)
+        if q_norm == 0:
+            return providers[:limit]
+        q /= q_norm
+
+        # Quantize the query the same way; int32 accumulation avoids int8
+        # overflow, and the constant query scale can't change the ranking
+        q_scale = np.abs(q).max() / 127.0
+        if q_scale == 0:
+            return providers[:limit]
+        q_int = np.round(q / q_scale).astype(np.int32)
+
+        scores = (matrix @ q_int) * row_scales
+        # Partial select of the top-k, then sort just those by score
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [providers[i] for i in top]
+
+    def _filter_batch_by_radius(self, batch, zip_lat: float,
+                                zip_lon: float, radius_km: float):
+        """Keep the rows in one streamed batch that fall inside the radius.
+
+        Works on anything exposing latitude/longitude and the precomputed
+        trig attributes - full Provider objects or narrow column rows. One
+        vectorized distance pass per batch; input order is preserved.
+        """
+        if all(p.sin_lat is not None for p in batch):
+            distances = calculate_distance_precomputed(
+                zip_lat, zip_lon,
+                np.array([p.sin_lat for p in batch]),
+                np.array([p.cos_lat for p in batch]),
+                np.array([p.lon_rad for p in batch])
+            )
+        else:
+            # Rows loaded before the trig columns existed
+            distances = calculate_distance_array(
+                zip_lat, zip_lon,
+                np.array([p.latitude for p in batch]),
+                np.array([p.longitude for p in batch])
+            )
+        return [batch[i] for i in np.flatnonzero(distances <= radius_km)]
+
+    def _query_providers(self, db: Session, drg: Optional[int],
+                         zip_code: Optional[int], radius_km: float,
+                         limit: int) -> List[Provider]:
+        """Synchronous DB half of get_relevant_providers.
+
+        Runs in the threadpool so the blocking psycopg2 round-trips never
+        stall the event loop.
+        """
         try:
             # Build query similar to /providers endpoint
             query = db.query(Provider)
@@ -162,75 +324,160 @@ class OpenAIService:
             # Filter by DRG if provided
             if drg is not None:
                 query = query.filter(Provider.ms_drg_definition == drg)
-                print(f"🔍 Filtering by DRG: {drg}")
-            
-            # Get all providers that match the DRG filter
-            providers = query.all()
-            print(f"📊 Total providers in database: {len(providers)}")
-            
+                logger.debug("Filtering by DRG: %s", drg)
+
+            # Sort by cost in SQL, where the (ms_drg_definition,
+            # average_total_payments) composite index applies
+            query = query.order_by(Provider.average_total_payments)
+
             # Filter by zip code and radius if both are provided
             if zip_code is not None and radius_km is not None:
-                print(f"🔍 Filtering by zip code: {zip_code} with radius: {radius_km}km")
+                logger.debug("Filtering by zip code: %s with radius: %skm",
+                             zip_code, radius_km)
                 # Geocode the input zip code using Nominatim
-                from .geocoding import geocode_zip_code_nominatim, is_within_radius
                 zip_lat, zip_lon = geocode_zip_code_nominatim(str(zip_code).zfill(5))
-                
+
                 if zip_lat is None or zip_lon is None:
                     print(f"⚠️  Could not geocode zip code: {zip_code}")
                     return []
-                
-                print(f"✅ Geocoded zip {zip_code} to coordinates: {zip_lat}, {zip_lon}")
-                
-                # Filter providers by distance
-                filtered_providers = []
-                for provider in providers:
-                    # Skip providers without coordinates
-                    if provider.latitude is None or provider.longitude is None:
-                        print(f"⚠️  Provider {provider.provider_name} has no coordinates")
-                        continue
-                    
-                    # Check if provider is within radius
-                    if is_within_radius(
-                        zip_lat, zip_lon, 
-                        provider.latitude, provider.longitude, 
-                        radius_km
-                    ):
-                        filtered_providers.append(provider)
-                        print(f"✅ Provider {provider.provider_name} is within radius")
-                    else:
-                        print(f"❌ Provider {provider.provider_name} is outside radius")
-                
-                providers = filtered_providers
-                print(f"📊 Providers after radius filtering: {len(providers)}")
-            
-            # Sort by average_total_payments (ascending)
-            providers = sorted(providers, key=lambda p: p.average_total_payments)
-            
-            # Limit results
-            providers = providers[:limit]
-            
-            print(f"✅ Got {len(providers)} providers from database query")
-            for provider in providers:
-                print(f"   - {provider.provider_name} ({provider.provider_city}, {provider.provider_state}) - Rating: {provider.star_rating}/10")
-            
+
+                logger.debug("Geocoded zip %s to coordinates: %s, %s",
+                             zip_code, zip_lat, zip_lon)
+
+                query = query.filter(Provider.latitude.isnot(None),
+                                     Provider.longitude.isnot(None))
+
+                # Push the radius filter into SQL - same earthdistance
+                # pattern as the /providers endpoint, so only rows inside
+                # the radius ever reach Python
+                try:
+                    point = func.ll_to_earth(zip_lat, zip_lon)
+                    provider_point = func.ll_to_earth(Provider.latitude, Provider.longitude)
+                    radius_m = radius_km * 1000
+                    providers = (
+                        query
+                        .filter(func.earth_box(point, radius_m).op('@>')(provider_point))
+                        .filter(func.earth_distance(point, provider_point) <= radius_m)
+                        .limit(limit)
+                        .all()
+                    )
+                except ProgrammingError:
+                    # earthdistance extension not installed. Stream just the
+                    # columns distance filtering needs, stopping once limit
+                    # in-radius rows have been found (rows arrive cost-sorted)
+                    # - ORM objects are never hydrated for rejected rows.
+                    db.rollback()
+                    slim = query.with_entities(
+                        Provider.id, Provider.latitude, Provider.longitude,
+                        Provider.sin_lat, Provider.cos_lat, Provider.lon_rad)
+                    hits = []
+                    batch = []
+                    for row in slim.yield_per(STREAM_BATCH):
+                        batch.append(row)
+                        if len(batch) == STREAM_BATCH:
+                            hits.extend(self._filter_batch_by_radius(
+                                batch, zip_lat, zip_lon, radius_km))
+                            batch = []
+                            if len(hits) >= limit:
+                                break
+                    if batch and len(hits) < limit:
+                        hits.extend(self._filter_batch_by_radius(
+                            batch, zip_lat, zip_lon, radius_km))
+
+                    # Hydrate only the winners, preserving cost order
+                    top_ids = [row.id for row in hits[:limit]]
+                    by_id = {p.id: p for p in
+                             db.query(Provider).filter(Provider.id.in_(top_ids))}
+                    providers = [by_id[pid] for pid in top_ids if pid in by_id]
+
+                logger.debug("Providers after radius filtering: %d",
+                             len(providers))
+            else:
+                if drg is not None:
+                    # Structured filter: the index satisfies both the filter
+                    # and the sort, so the top rows come straight off it
+                    providers = query.limit(limit).all()
+                else:
+                    # No filter to narrow things down; hand similarity
+                    # ranking a bounded pool of the cheapest providers so
+                    # the embedding matrix can't scale with the full table
+                    providers = query.limit(SIMILARITY_CANDIDATES).all()
+                logger.debug("Total providers in database: %d", len(providers))
+
+            if drg is not None or zip_code is not None:
+                # Rows already arrive cost-sorted (and limited where the
+                # whole filter ran in SQL); trim the Python-filtered case
+                providers = providers[:limit]
+
             return providers
-            
+
         except Exception as e:
             print(f"⚠️  Error in database query: {e}")
             return []
-        finally:
-            db.close()
-    
-    def generate_response(self, query: str, relevant_providers: List[Provider]) -> str:
+
+    async def get_relevant_providers(self, db: Session, query: str,
+                                     limit: int = 10) -> List[Provider]:
+        """
+        Fast & reliable provider retrieval.
+        1. Parse possible `drg`, `zip`, `radius_km` tokens from the question.
+        2. Run the same geocoding / radius logic as the /providers endpoint
+           on the request's db session, so no extra connection is checked out.
+        3. Return at most `limit` rows (already sorted by cost in the router).
+        """
+        # ---------- extract tokens ----------
+        # One fused finditer pass dispatches each token on the named group
+        # that matched, instead of re-scanning the question per token kind
+        question = query
+
+        drg = None
+        zip_code = None
+        radius = None
+        for match in _PARSE_RE.finditer(query):
+            kind = match.lastgroup
+            if kind == 'drg' and drg is None:
+                drg = int(match.group('drg'))
+            elif kind == 'zip' and zip_code is None:
+                zip_code = int(match.group('zip'))
+            elif kind in ('radius', 'radius2') and radius is None:
+                radius = float(match.group(kind))
+
+        # Default radius of 40km
+        radius_km = radius if radius is not None else 40.0
+
+        logger.debug("Extracted from query '%s': drg=%s, zip=%s, radius_km=%s",
+                     query, drg, zip_code, radius_km)
+
+        # ---------- delegate to existing SQL logic ----------
+        # Use direct database query instead of TestClient to avoid circular imports
+        providers = await run_in_threadpool(
+            self._query_providers, db, drg, zip_code, radius_km, limit)
+
+        if drg is None and zip_code is None:
+            # No structured filters came out of the question, so the DB
+            # couldn't narrow it down - rank by embedding similarity
+            providers = await self.rank_providers_by_similarity(question, providers, limit)
+
+        logger.debug("Got %d providers from database query", len(providers))
+        for provider in providers:
+            logger.debug("   - %s (%s, %s) - Rating: %s/10",
+                         provider.provider_name, provider.provider_city,
+                         provider.provider_state, provider.star_rating)
+
+        return providers
+
+    async def generate_response(self, query: str, relevant_providers: List[Provider]) -> str:
         """Generate a response using OpenAI with provider context"""
         if not relevant_providers:
             return "I couldn't find any relevant provider information for your query. Please try rephrasing your question about medical procedures, costs, or hospital ratings."
         
-        # Debug: Print the providers being used
-        print(f"🔍 Generating response for query: {query}")
-        print(f"📊 Number of relevant providers: {len(relevant_providers)}")
+        # Debug: log the providers being used; nothing is formatted unless
+        # DEBUG logging is enabled
+        logger.debug("Generating response for query: %s", query)
+        logger.debug("Number of relevant providers: %d", len(relevant_providers))
         for i, provider in enumerate(relevant_providers):
-            print(f"   {i+1}. {provider.provider_name} ({provider.provider_city}, {provider.provider_state}) - Rating: {provider.star_rating}/10")
+            logger.debug("   %d. %s (%s, %s) - Rating: %s/10",
+                         i + 1, provider.provider_name, provider.provider_city,
+                         provider.provider_state, provider.star_rating)
         
         # Prepare a concise context from relevant providers
         context = "Relevant providers:\n"
@@ -251,7 +498,7 @@ class OpenAIService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -266,20 +513,20 @@ class OpenAIService:
             print(f"Error generating response: {e}")
             return "I apologize, but I'm having trouble generating a response right now. Please try again later."
     
-    async def ask(self, query: str) -> str:
+    async def ask(self, query: str, db: Session) -> str:
         """Main method to handle user queries"""
         try:
             # Check if query is healthcare-related
-            if not self.is_healthcare_related(query):
+            if not await self.is_healthcare_related(query):
                 return "I can only help with hospital pricing and quality information. Please ask about medical procedures, costs or hospital ratings."
-            
+
             # Get relevant providers using embeddings
-            print(f"🔍 Processing query: {query}")
-            relevant_providers = self.get_relevant_providers(query)
-            print(f"📊 Found {len(relevant_providers)} relevant providers")
-            
+            logger.debug("Processing query: %s", query)
+            relevant_providers = await self.get_relevant_providers(db, query)
+            logger.debug("Found %d relevant providers", len(relevant_providers))
+
             # Generate response
-            return self.generate_response(query, relevant_providers)
+            return await self.generate_response(query, relevant_providers)
         except Exception as e:
             print(f"❌ Error in ask endpoint: {e}")
             return "I apologize, but I'm having trouble processing your request right now. Please try again later."
\ No newline at end of file
@@ -1,7 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
 from uuid import UUID
-from decimal import Decimal
 
 class ProviderBase(BaseModel):
     provider_id: str
@@ -11,9 +10,10 @@ class ProviderBase(BaseModel):
     provider_zip_code: int
     ms_drg_definition: int
     total_discharges: int
-    average_covered_charges: Decimal
-    average_total_payments: Decimal
-    average_medicare_payments: Decimal
+    # Floats, not Decimals: the API reads these pre-cast to float in SQL
+    average_covered_charges: float
+    average_total_payments: float
+    average_medicare_payments: float
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     star_rating: int
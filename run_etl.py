@@ -4,12 +4,17 @@ Manual ETL runner for troubleshooting
 """
 
 import os
+import shutil
 import sys
 import subprocess
 
 # Add current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Probe for psql once at import instead of spawning a subprocess just to
+# catch FileNotFoundError when it isn't installed
+PSQL = shutil.which("psql")
+
 def main():
     """Run the ETL process manually"""
     print("🚀 Running ETL process manually...")
@@ -22,9 +27,12 @@ def main():
         
         # Check the results using subprocess to avoid SQLAlchemy issues
         print("\n🔍 Checking results...")
+        if PSQL is None:
+            print("⚠️  psql not found; skipping results check")
+            return
         try:
             result = subprocess.run(
-                ["psql", "-h", "localhost", "-U", "postgres", "-d", "providers", "-c", "SELECT COUNT(*) FROM providers;"],
+                [PSQL, "-h", "localhost", "-U", "postgres", "-d", "providers", "-c", "SELECT COUNT(*) FROM providers;"],
                 capture_output=True,
                 text=True,
                 timeout=10